@@ -6,81 +6,327 @@ Author: Venkata Ganesh Kumar Nethuluri
 =============================================================
 """
 
-import json
+import gzip
+import itertools
 import logging
 import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Any
+from io import BytesIO
+from typing import List, Dict, Any, Optional
 
 import boto3
+import msgspec
+import orjson
+import zstandard as zstd
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, BotoCoreError
 
 logger = logging.getLogger(__name__)
 
+# Supported S3_OUTPUT_FORMAT values -> (Content-Type, key extension)
+OUTPUT_FORMATS = {
+    "msgpack": ("application/x-msgpack", "msgpack"),
+    "json":    ("application/json", "json"),
+}
+
+# Supported S3_COMPRESSION values -> (Content-Encoding, key suffix)
+COMPRESSIONS = {
+    "zstd": ("zstd", "zst"),
+    "gzip": ("gzip", "gz"),
+    "none": (None, None),
+}
+
+# One compressor per uploading thread (ZstdCompressor is not safe for concurrent use);
+# each is reused across uploads so compression parameters and worker threads are set up once
+_CCTX = threading.local()
+
+
+def _zstd_compressor(threads: int) -> zstd.ZstdCompressor:
+    compressors = getattr(_CCTX, "compressors", None)
+    if compressors is None:
+        compressors = _CCTX.compressors = {}
+    cctx = compressors.get(threads)
+    if cctx is None:
+        cctx = compressors[threads] = zstd.ZstdCompressor(level=3, threads=threads)
+    return cctx
+
+MB = 1024 ** 2
+
+# Pooled keep-alive connections are reused across cycles, avoiding a TLS handshake per PUT
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"max_attempts": 5, "mode": "adaptive"}
+)
+
+# Upper bound on concurrent shard PUTs when S3_UPLOAD_SHARDS > 1
+MAX_INFLIGHT_PUTS = 16
+
+# One Session per process: credential and endpoint resolution happen once, not per client
+_SESSION = boto3.session.Session(region_name=os.getenv("AWS_REGION", "ap-south-1"))
+
+# Bodies above the threshold go through the Transfer Manager as parallel multipart uploads
+MULTIPART_THRESHOLD = 8 * MB
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=8 * MB,
+    use_threads=True
+)
+
+
+def _msgpack_enc_hook(obj: Any) -> Any:
+    """Mirror orjson's OPT_SERIALIZE_NUMPY + default=str so both formats carry the same values."""
+    if hasattr(obj, "tolist"):  # numpy scalars and arrays
+        return obj.tolist()
+    return str(obj)
+
+
+def partition_by_sensor(data: List[Dict[str, Any]], n: int) -> List[List[Dict[str, Any]]]:
+    """Split records into n shards; a sensor_id always maps to the same shard."""
+    shards = [[] for _ in range(n)]
+    for record in data:
+        shards[zlib.crc32(str(record.get("sensor_id")).encode()) % n].append(record)
+    return shards
+
+
+class Batcher:
+    """
+    Accumulates clean records across pipeline cycles so they can be written
+    as one S3 object once max_records or max_window_s is reached.
+    """
+
+    def __init__(self, max_records: int = 10_000, max_window_s: float = 300):
+        self.max_records  = max_records
+        self.max_window_s = max_window_s
+        self._records: List[Dict[str, Any]] = []
+        self._window_start = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, records: List[Dict[str, Any]]) -> None:
+        if not self._records:
+            self._window_start = time.monotonic()
+        self._records.extend(records)
+
+    def should_flush(self) -> bool:
+        if not self._records:
+            return False
+        return (
+            len(self._records) >= self.max_records
+            or time.monotonic() - self._window_start >= self.max_window_s
+        )
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Return the buffered records and start a new batching window."""
+        records, self._records = self._records, []
+        self._window_start = time.monotonic()
+        return records
+
 
 class S3Uploader:
     """Manages upload of IoT sensor data to AWS S3 with partitioned paths."""
 
     def __init__(self):
         self.bucket_name = os.getenv("S3_BUCKET_NAME", "iot-pipeline-data")
-        self.aws_region  = os.getenv("AWS_REGION", "ap-south-1")
+        self.aws_region  = _SESSION.region_name
+        # JSON remains available for downstream Athena/Glue consumers
+        self.output_format = os.getenv("S3_OUTPUT_FORMAT", "msgpack").lower()
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unsupported S3_OUTPUT_FORMAT '{self.output_format}', "
+                f"expected one of {sorted(OUTPUT_FORMATS)}"
+            )
+        # gzip is readable by Athena/Glue; zstd gives better ratio and speed
+        self.compression = os.getenv("S3_COMPRESSION", "zstd").lower()
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(
+                f"Unsupported S3_COMPRESSION '{self.compression}', "
+                f"expected one of {sorted(COMPRESSIONS)}"
+            )
+
+        # Per-upload constants, resolved once instead of on every cycle
+        self._key_prefix = "clean-data"
+        self._static_meta = {"pipeline": "iot-realtime-data-pipeline"}
+        self._content_type, extension = OUTPUT_FORMATS[self.output_format]
+        self._content_encoding, suffix = COMPRESSIONS[self.compression]
+        self._extension = f"{extension}.{suffix}" if suffix else extension
+
+        # >1 fans each upload out into per-sensor shards PUT concurrently
+        self.upload_shards = int(os.getenv("S3_UPLOAD_SHARDS", "1"))
+        if self.upload_shards < 1:
+            raise ValueError(f"S3_UPLOAD_SHARDS must be >= 1, got {self.upload_shards}")
+        self._executor = None
+        # Multi-threaded zstd for a single upload; shards already compress in parallel,
+        # so each shard thread compresses single-threaded instead of spawning ncpu workers
+        self._zstd_threads = -1
+        if self.upload_shards > 1:
+            self._zstd_threads = 0
+            self._executor = ThreadPoolExecutor(
+                max_workers=min(MAX_INFLIGHT_PUTS, self.upload_shards),
+                thread_name_prefix="s3-put"
+            )
 
-        self.s3_client = boto3.client("s3", region_name=self.aws_region)
-        logger.info(f"S3Uploader initialized | Bucket: {self.bucket_name} | Region: {self.aws_region}")
+        # Batches can be uploaded back to back within one second; the sequence number
+        # keeps their keys distinct so a later PUT never overwrites an earlier object
+        self._upload_seq = itertools.count()
+
+        self.s3_client = _SESSION.client("s3", config=S3_CLIENT_CONFIG)
+        logger.info(
+            "S3Uploader initialized | Bucket: %s | Region: %s | Format: %s | Compression: %s | Shards: %d",
+            self.bucket_name, self.aws_region, self.output_format, self.compression, self.upload_shards
+        )
 
     def upload(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Upload data to S3 with date-partitioned path.
-        Path format: clean-data/year=YYYY/month=MM/day=DD/HH-MM-SS.json
+        Path format: clean-data/year=YYYY/month=MM/day=DD/HH-MM-SS-ffffff-NNNN-readings.<ext>[.<suffix>]
+        where ffffff is microseconds and NNNN this uploader's upload sequence number,
+        <ext> is 'msgpack' (default) or 'json' per S3_OUTPUT_FORMAT and
+        <suffix> is 'zst' (default) or 'gz' per S3_COMPRESSION.
+        With S3_UPLOAD_SHARDS > 1, records are split by sensor_id into
+        HH-MM-SS-ffffff-NNNN-readings-partNN objects uploaded concurrently.
+        Single-object results keep s3_key / s3_uri; both modes list the written
+        objects in s3_keys / s3_uris.
         """
         if not data:
             logger.warning("No data to upload")
             return {"status": "skipped", "reason": "empty data"}
 
         now = datetime.utcnow()
-        s3_key = (
-            f"clean-data/"
-            f"year={now.strftime('%Y')}/"
-            f"month={now.strftime('%m')}/"
-            f"day={now.strftime('%d')}/"
-            f"{now.strftime('%H-%M-%S')}-readings.json"
+        stamp = (
+            f"{now.hour:02d}-{now.minute:02d}-{now.second:02d}-"
+            f"{now.microsecond:06d}-{next(self._upload_seq):04d}"
+        )
+        key_dir = (
+            f"{self._key_prefix}/"
+            f"year={now.year:04d}/"
+            f"month={now.month:02d}/"
+            f"day={now.day:02d}/"
         )
 
-        payload = {
-            "pipeline_version": "1.0",
-            "upload_timestamp": now.isoformat(),
+        if self._executor is None:
+            result = self._upload_object(data, now, f"{key_dir}{stamp}-readings.{self._extension}")
+            return {**result, "s3_keys": [result["s3_key"]], "s3_uris": [result["s3_uri"]]}
+
+        results = self._upload_shards(data, now, key_dir, stamp)
+        return {
+            "status": "success",
+            "s3_keys": [result["s3_key"] for result in results],
+            "s3_uris": [result["s3_uri"] for result in results],
             "record_count": len(data),
-            "records": data
+            "timestamp": results[0]["timestamp"]
         }
 
+    def _upload_shards(
+        self, data: List[Dict[str, Any]], now: datetime, key_dir: str, stamp: str
+    ) -> List[Dict[str, Any]]:
+        """PUT per-sensor shards concurrently; raises the first failure after all shards settle."""
+        futures = [
+            self._executor.submit(
+                self._upload_object, shard, now, f"{key_dir}{stamp}-readings-part{i:02d}.{self._extension}"
+            )
+            for i, shard in enumerate(partition_by_sensor(data, self.upload_shards))
+            if shard
+        ]
+        wait(futures)
+
+        failed = [future for future in futures if future.exception() is not None]
+        if failed:
+            written = [future.result()["s3_key"] for future in futures if future.exception() is None]
+            logger.error(
+                "Sharded upload incomplete | %d of %d shards failed | Already written (left in place): %s",
+                len(failed), len(futures), written
+            )
+            raise failed[0].exception()
+
+        return [future.result() for future in futures]
+
+    def _upload_object(self, data: List[Dict[str, Any]], now: datetime, s3_key: str) -> Dict[str, Any]:
+        """Serialize, compress and upload one S3 object."""
+        n = len(data)
+        iso = now.isoformat()
+
         try:
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=json.dumps(payload, indent=2, default=str),
-                ContentType="application/json",
-                Metadata={
-                    "record-count": str(len(data)),
-                    "upload-timestamp": now.isoformat(),
-                    "pipeline": "iot-realtime-data-pipeline"
-                }
+            self._put(
+                s3_key,
+                self._compress(self._serialize(data, now)),
+                content_type=self._content_type,
+                content_encoding=self._content_encoding,
+                metadata={**self._static_meta, "record-count": str(n), "upload-timestamp": iso}
             )
 
             s3_uri = f"s3://{self.bucket_name}/{s3_key}"
-            logger.info(f"✅ Uploaded {len(data)} records to {s3_uri}")
+            logger.info("✅ Uploaded %d records to %s", n, s3_uri)
 
             return {
                 "status": "success",
                 "s3_key": s3_key,
                 "s3_uri": s3_uri,
-                "record_count": len(data),
-                "timestamp": now.isoformat()
+                "record_count": n,
+                "timestamp": iso
             }
 
         except ClientError as e:
             error_code = e.response["Error"]["Code"]
-            logger.error(f"S3 upload failed | Code: {error_code} | Key: {s3_key}")
+            logger.error("S3 upload failed | Code: %s | Key: %s", error_code, s3_key)
+            raise
+        except S3UploadFailedError as e:
+            logger.error("S3 multipart upload failed | Key: %s | %s", s3_key, e)
             raise
         except BotoCoreError as e:
-            logger.error(f"AWS SDK error during upload: {str(e)}")
+            logger.error("AWS SDK error during upload: %s", e)
             raise
+
+    def _put(
+        self,
+        s3_key: str,
+        body: bytes,
+        content_type: str,
+        content_encoding: Optional[str],
+        metadata: Dict[str, str]
+    ) -> None:
+        """Single PUT for small bodies; threaded multipart upload above MULTIPART_THRESHOLD."""
+        extra_args = {"ContentType": content_type, "Metadata": metadata}
+        if content_encoding:
+            extra_args["ContentEncoding"] = content_encoding
+
+        if len(body) <= MULTIPART_THRESHOLD:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=s3_key, Body=body, **extra_args)
+            return
+
+        self.s3_client.upload_fileobj(
+            BytesIO(body),
+            self.bucket_name,
+            s3_key,
+            Config=TRANSFER_CONFIG,
+            ExtraArgs=extra_args
+        )
+
+    def _compress(self, body: bytes) -> bytes:
+        """Compress the serialized payload per S3_COMPRESSION."""
+        if self.compression == "zstd":
+            return _zstd_compressor(self._zstd_threads).compress(body)
+        if self.compression == "gzip":
+            return gzip.compress(body, compresslevel=6)
+        return body
+
+    def _serialize(self, data: List[Dict[str, Any]], now: datetime) -> bytes:
+        """Encode the upload payload in the configured output format; both formats share one shape."""
+        payload = {
+            "pipeline_version": "1.0",
+            "upload_timestamp": now,
+            "record_count": len(data),
+            "records": data
+        }
+        if self.output_format == "msgpack":
+            return msgspec.msgpack.encode(payload, enc_hook=_msgpack_enc_hook)
+
+        # Compact output: objects are machine-read, so no pretty-print whitespace
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
@@ -7,16 +7,19 @@ Author: Venkata Ganesh Kumar Nethuluri
 
 import argparse
 import logging
+import queue
 import sys
+import threading
 import time
 from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
 
 from ingestion.api_client import IoTApiClient
 from ingestion.data_validator import DataValidator
 from ingestion.batch_processor import BatchProcessor
 from anomaly.detector import AnomalyDetector
 from anomaly.alert_handler import AlertHandler
-from storage.s3_uploader import S3Uploader
+from storage.s3_uploader import S3Uploader, Batcher
 from monitoring.pipeline_monitor import PipelineMonitor
 
 # Configure logging
@@ -30,6 +33,134 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Adaptive polling bounds (seconds)
+BASE_POLL_INTERVAL = 30
+MIN_POLL_INTERVAL  = 5
+MAX_POLL_INTERVAL  = 300
+
+# Per-page record count treated as the API ceiling; a last page nearing it signals a backlog
+EXPECTED_MAX_RECORDS = 1000
+
+
+def _next_poll_interval(current: float, records_fetched: int, last_page_size: int) -> float:
+    """
+    Back off on empty polls, speed up when the last page approaches EXPECTED_MAX_RECORDS.
+    A paginated cycle drains every page, so only a near-full last page (not a large
+    total) means readings are still waiting; for a single-shot fetch both are equal.
+    """
+    if records_fetched == 0:
+        return min(MAX_POLL_INTERVAL, current * 1.5)
+    if last_page_size >= EXPECTED_MAX_RECORDS * 0.8:
+        return max(MIN_POLL_INTERVAL, current * 0.5)
+    return BASE_POLL_INTERVAL
+
+
+# Pages fetched ahead of the one being validated / checked for anomalies
+PREFETCH_PAGES = 2
+
+_END_OF_PAGES = object()
+
+# Attempts per batch before it is dropped; the delay doubles after each failure (seconds)
+UPLOAD_ATTEMPTS      = 3
+UPLOAD_RETRY_DELAY_S = 5
+
+
+def _iter_pages(api_client: IoTApiClient) -> Iterable[List[Dict[str, Any]]]:
+    """
+    Pages of readings for one cycle. A paginated client (iter_latest_readings)
+    is prefetched on a background thread; the single-shot fetch_latest_readings
+    is one page with nothing to overlap, so it runs inline.
+    """
+    iter_latest_readings = getattr(api_client, "iter_latest_readings", None)
+    if iter_latest_readings is not None:
+        return _prefetch(iter_latest_readings())
+    return [api_client.fetch_latest_readings()]
+
+
+def _prefetch(pages: Iterable[List[Dict[str, Any]]], depth: int = PREFETCH_PAGES) -> Iterator[List[Dict[str, Any]]]:
+    """Fetch page N+1 on a background thread while the caller processes page N."""
+    page_q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                page_q.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        # Always post a terminal item, or the consumer's page_q.get() would block forever
+        end = _END_OF_PAGES
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+        except BaseException as e:
+            end = e
+        finally:
+            put(end)
+
+    threading.Thread(target=producer, daemon=True).start()
+    try:
+        while True:
+            item = page_q.get()
+            if item is _END_OF_PAGES:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _queue_batch_if_due(batcher: Batcher, upload_q: queue.Queue):
+    """Hand the buffered records to the upload worker once the batch is full or its window expires."""
+    if batcher.should_flush():
+        logger.info("☁️  Queueing %d batched records for S3 upload...", len(batcher))
+        upload_q.put(batcher.flush())
+
+
+def _uploader_worker(upload_q: queue.Queue, s3_uploader: S3Uploader, monitor: PipelineMonitor):
+    """Drain batches from the upload queue so S3 PUTs overlap the next fetch cycle."""
+    while True:
+        data = upload_q.get()
+        try:
+            _upload_batch(data, s3_uploader, monitor)
+        finally:
+            upload_q.task_done()
+
+
+def _upload_batch(data: List[Dict[str, Any]], s3_uploader: S3Uploader, monitor: PipelineMonitor):
+    """
+    Upload one batch, retrying with backoff. Retries happen here rather than by
+    re-queueing: this worker is the queue's only consumer, so putting into a full
+    queue would block it forever. A batch that still fails is dropped and reported.
+    """
+    for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+        try:
+            upload_result = s3_uploader.upload(data)
+        except Exception as e:
+            if attempt < UPLOAD_ATTEMPTS:
+                delay = UPLOAD_RETRY_DELAY_S * 2 ** (attempt - 1)
+                logger.warning(
+                    "⚠️  S3 upload attempt %d/%d failed: %s | Retrying in %.0fs...",
+                    attempt, UPLOAD_ATTEMPTS, e, delay
+                )
+                time.sleep(delay)
+                continue
+            logger.error(
+                "❌ S3 upload error after %d attempts | Dropped %d records: %s",
+                UPLOAD_ATTEMPTS, len(data), e, exc_info=True
+            )
+            monitor.record_cycle_failure(f"S3 upload failed, dropped {len(data)} records: {e}")
+            return
+
+        logger.info("   ✅ Uploaded: %s", ", ".join(upload_result.get("s3_keys", [])))
+        return
+
 
 def run_realtime_pipeline():
     """Run the pipeline in real-time streaming mode."""
@@ -42,70 +173,93 @@ def run_realtime_pipeline():
     detector       = AnomalyDetector()
     alert_handler  = AlertHandler()
     s3_uploader    = S3Uploader()
+    batcher        = Batcher()
     monitor        = PipelineMonitor()
 
-    POLL_INTERVAL = 30  # seconds
+    poll_interval = BASE_POLL_INTERVAL
+
+    upload_q = queue.Queue(maxsize=8)
+    threading.Thread(target=_uploader_worker, args=(upload_q, s3_uploader, monitor), daemon=True).start()
 
     while True:
         cycle_start = time.time()
         monitor.record_cycle_start()
 
         try:
-            # Step 1: Fetch data from IoT sensors via REST API
+            records_fetched = records_clean = anomaly_count = last_page_size = 0
+
+            # Step 1: Fetch data from IoT sensors via REST API (paginated clients prefetch the next page)
             logger.info("📡 Fetching sensor data from IoT API...")
-            raw_data = api_client.fetch_latest_readings()
-            logger.info(f"   Fetched {len(raw_data)} sensor records")
+            for page in _iter_pages(api_client):
+                records_fetched += len(page)
+                last_page_size = len(page)
+                logger.info("   Fetched page of %d sensor records", len(page))
 
-            # Step 2: Validate data schema and quality
-            logger.info("🔍 Validating data...")
-            valid_data, invalid_records = validator.validate(raw_data)
-            
-            if invalid_records:
-                logger.warning(f"   ⚠️  {len(invalid_records)} invalid records found and excluded")
-                monitor.record_validation_failures(len(invalid_records))
+                # Step 2: Validate data schema and quality
+                valid_data, invalid_records = validator.validate(page)
 
-            logger.info(f"   ✅ {len(valid_data)} records passed validation")
+                if invalid_records:
+                    logger.warning("   ⚠️  %d invalid records found and excluded", len(invalid_records))
+                    monitor.record_validation_failures(len(invalid_records))
 
-            # Step 3: Run anomaly detection
-            logger.info("🔎 Running anomaly detection...")
-            clean_data, anomalies = detector.detect(valid_data)
+                # Step 3: Run anomaly detection
+                clean_data, anomalies = detector.detect(valid_data)
 
-            if anomalies:
-                logger.warning(f"   ⚠️  {len(anomalies)} anomalies detected!")
-                alert_handler.send_alerts(anomalies)
-                monitor.record_anomalies(len(anomalies))
+                if anomalies:
+                    logger.warning("   ⚠️  %d anomalies detected!", len(anomalies))
+                    alert_handler.send_alerts(anomalies)
+                    monitor.record_anomalies(len(anomalies))
+                    anomaly_count += len(anomalies)
 
-            logger.info(f"   ✅ {len(clean_data)} clean records")
+                # Step 4: Batch clean data; upload to S3 once the batch is full or its window expires
+                records_clean += len(clean_data)
+                batcher.add(clean_data)
+                _queue_batch_if_due(batcher, upload_q)
 
-            # Step 4: Upload clean data to S3
-            logger.info("☁️  Uploading clean data to S3...")
-            upload_result = s3_uploader.upload(clean_data)
-            logger.info(f"   ✅ Uploaded: {upload_result['s3_key']}")
+            logger.info(
+                "   ✅ %d fetched | %d clean | %d records buffered for next S3 upload",
+                records_fetched, records_clean, len(batcher)
+            )
 
             # Step 5: Record pipeline metrics
             cycle_duration = time.time() - cycle_start
             monitor.record_cycle_success(
-                records_processed=len(raw_data),
-                records_clean=len(clean_data),
-                anomaly_count=len(anomalies) if anomalies else 0,
+                records_processed=records_fetched,
+                records_clean=records_clean,
+                anomaly_count=anomaly_count,
                 duration_seconds=cycle_duration
             )
 
-            logger.info(f"✅ Cycle complete in {cycle_duration:.2f}s | Sleeping {POLL_INTERVAL}s...")
+            poll_interval = _next_poll_interval(poll_interval, records_fetched, last_page_size)
+            logger.info("✅ Cycle complete in %.2fs | Sleeping %.0fs...", cycle_duration, poll_interval)
 
         except KeyboardInterrupt:
             logger.info("🛑 Pipeline stopped by user")
             break
         except Exception as e:
-            logger.error(f"❌ Pipeline error: {str(e)}", exc_info=True)
+            logger.error("❌ Pipeline error: %s", e, exc_info=True)
             monitor.record_cycle_failure(str(e))
+            poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 2)
+
+        # Enforce the batching window even on cycles whose fetch failed or returned no pages
+        _queue_batch_if_due(batcher, upload_q)
+
+        try:
+            time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            logger.info("🛑 Pipeline stopped by user")
+            break
 
-        time.sleep(POLL_INTERVAL)
+    # Flush whatever is still buffered so no clean records are dropped on shutdown
+    if len(batcher):
+        logger.info("☁️  Flushing %d residual records to S3...", len(batcher))
+        upload_q.put(batcher.flush())
+    upload_q.join()
 
 
 def run_batch_pipeline(batch_date: str):
     """Run the pipeline in batch mode for a specific date."""
-    logger.info(f"📦 Starting batch pipeline for date: {batch_date}")
+    logger.info("📦 Starting batch pipeline for date: %s", batch_date)
     
     processor = BatchProcessor()
     processor.process_date(batch_date)
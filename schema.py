@@ -0,0 +1,75 @@
+"""
+=============================================================
+schema.py - IoT Sensor Reading Schema
+Shared record schema for ingestion and storage (msgspec only)
+Author: Venkata Ganesh Kumar Nethuluri
+=============================================================
+"""
+
+import numbers
+from datetime import datetime
+from typing import Annotated, Any, Optional, Union
+
+import msgspec
+
+REQUIRED_FIELDS = ["sensor_id", "timestamp", "temperature"]
+
+FIELD_TYPES = {
+    "sensor_id":   str,
+    "timestamp":   (str, datetime, int, float),  # ISO-8601 string / datetime or epoch seconds
+    "temperature": (int, float),
+    "humidity":    (int, float),
+    "pressure":    (int, float),
+    "vibration":   (int, float),
+    "voltage":     (int, float),
+}
+
+NUMERIC_FIELDS = ("temperature", "humidity", "pressure", "vibration", "voltage")
+
+# Exclusive upper bound for epoch-second timestamps (2100-01-01T00:00:00Z)
+MAX_EPOCH_S = 4102444800
+
+# ISO-8601 strings are parsed as datetime by msgspec's strict RFC 3339 parser, so
+# calendar dates, UTC offsets and trailing characters are all part of validity
+_EpochSeconds = msgspec.Meta(gt=0, lt=MAX_EPOCH_S)
+Timestamp = Union[
+    datetime,
+    Annotated[int, _EpochSeconds],
+    Annotated[float, _EpochSeconds],
+]
+
+
+def is_number(value: Any) -> bool:
+    """
+    True for real numbers other than bool. Builtin int/float take the identity
+    fast path; numpy scalars (np.float64, np.int64, ...) register as numbers.Real.
+    """
+    value_type = type(value)
+    return value_type is float or value_type is int or (
+        value_type is not bool and isinstance(value, numbers.Real)
+    )
+
+
+def parse_iso_timestamp(value: Any) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp with the same rules as SensorReading; None if invalid."""
+    try:
+        return msgspec.convert(value, datetime)
+    except msgspec.ValidationError:
+        return None
+
+
+class SensorReading(msgspec.Struct, omit_defaults=True):
+    """
+    Typed sensor record mirroring REQUIRED_FIELDS / FIELD_TYPES.
+    Used by msgspec to validate records in C. msgspec only accepts builtin
+    numbers, so records carrying numpy scalars are re-checked with those
+    values converted (see DataValidator._check_record).
+    """
+
+    sensor_id:   Annotated[str, msgspec.Meta(pattern=r"\S")]
+    timestamp:   Timestamp
+    temperature: float
+    humidity:    Optional[float] = None
+    pressure:    Optional[float] = None
+    vibration:   Optional[float] = None
+    voltage:     Optional[float] = None
@@ -7,22 +7,66 @@ Author: Venkata Ganesh Kumar Nethuluri
 """
 
 import logging
-from typing import List, Dict, Any, Tuple
+import numbers
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+import msgspec
+
+from ingestion.schema import (
+    FIELD_TYPES,
+    MAX_EPOCH_S,
+    NUMERIC_FIELDS,
+    REQUIRED_FIELDS,
+    SensorReading,
+    is_number,
+    parse_iso_timestamp,
+)
+
 logger = logging.getLogger(__name__)
 
-REQUIRED_FIELDS = ["sensor_id", "timestamp", "temperature"]
+# Precomputed once so the per-record loop iterates tuples, not dicts
+_REQUIRED = tuple(REQUIRED_FIELDS)
+_FIELD_TYPES_ITEMS = tuple(FIELD_TYPES.items())
+
+
+def _is_str(value: Any) -> bool:
+    return type(value) is str
+
+
+def _is_timestamp(value: Any) -> bool:
+    return type(value) is str or isinstance(value, datetime) or is_number(value)
+
+
+# Per-field type predicates; identity checks first, bool never counts as a number
+_TYPE_CHECKS = {"sensor_id": _is_str, "timestamp": _is_timestamp, **{f: is_number for f in NUMERIC_FIELDS}}
+_FIELD_CHECKS = tuple((field, _TYPE_CHECKS[field], expected) for field, expected in _FIELD_TYPES_ITEMS)
+_CONVERTIBLE_FIELDS = ("timestamp",) + NUMERIC_FIELDS
+
 
-FIELD_TYPES = {
-    "sensor_id":   str,
-    "timestamp":   str,
-    "temperature": (int, float),
-    "humidity":    (int, float),
-    "pressure":    (int, float),
-    "vibration":   (int, float),
-    "voltage":     (int, float),
-}
+def _schema_error(record: Any) -> Optional[str]:
+    try:
+        msgspec.convert(record, SensorReading)
+    except msgspec.ValidationError as e:
+        return str(e)
+    return None
+
+
+def _with_builtin_numbers(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Copy of record with numpy / other numbers.Real scalars as int or float; None if nothing to convert."""
+    converted = None
+    for field in _CONVERTIBLE_FIELDS:
+        value = record.get(field)
+        value_type = type(value)
+        if value_type is int or value_type is float or not is_number(value):
+            continue
+        if converted is None:
+            converted = dict(record)
+        converted[field] = int(value) if isinstance(value, numbers.Integral) else float(value)
+    return converted
+
+
+_READINGS = List[SensorReading]
 
 
 class DataValidator:
@@ -32,45 +76,72 @@ class DataValidator:
         """
         Validate a list of sensor records.
         Returns (valid_records, invalid_records).
+
+        The whole batch is validated against SensorReading in a single
+        msgspec call; only batches containing invalid records fall back
+        to per-record conversion to split them.
         """
+        try:
+            msgspec.convert(records, _READINGS)
+        except msgspec.ValidationError:
+            pass
+        else:
+            logger.info("Validation | Total: %d | Valid: %d | Invalid: 0", len(records), len(records))
+            return list(records), []
+
         valid = []
         invalid = []
 
         for record in records:
-            is_valid, errors = self._validate_record(record)
+            is_valid, errors = self._check_record(record)
             if is_valid:
                 valid.append(record)
             else:
                 invalid.append({"record": record, "errors": errors})
-                logger.debug(f"Invalid record {record.get('sensor_id', 'unknown')}: {errors}")
+                logger.debug("Invalid record %s: %s", record.get("sensor_id", "unknown"), errors)
 
-        logger.info(f"Validation | Total: {len(records)} | Valid: {len(valid)} | Invalid: {len(invalid)}")
+        logger.info("Validation | Total: %d | Valid: %d | Invalid: %d", len(records), len(valid), len(invalid))
         return valid, invalid
 
+    def _check_record(self, record: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """Validate one record against SensorReading, explaining any rejection."""
+        error = _schema_error(record)
+        if error is not None:
+            converted = _with_builtin_numbers(record)
+            if converted is not None:
+                error = _schema_error(converted)
+        if error is not None:
+            _, errors = self._validate_record(record)
+            return False, errors or [error]
+
+        return True, []
+
     def _validate_record(self, record: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """Collect human-readable errors for a record rejected by SensorReading."""
         errors = []
 
         # Check required fields
-        for field in REQUIRED_FIELDS:
-            if field not in record or record[field] is None:
+        for field in _REQUIRED:
+            if record.get(field) is None:
                 errors.append(f"Missing required field: '{field}'")
 
         # Check field types
-        for field, expected_type in FIELD_TYPES.items():
-            if field in record and record[field] is not None:
-                if not isinstance(record[field], expected_type):
-                    errors.append(f"Invalid type for '{field}': expected {expected_type}, got {type(record[field])}")
-
-        # Check timestamp format
-        if "timestamp" in record and record["timestamp"]:
-            try:
-                datetime.fromisoformat(str(record["timestamp"]).replace("Z", "+00:00"))
-            except ValueError:
-                errors.append(f"Invalid timestamp format: '{record['timestamp']}'")
+        for field, is_valid_type, expected_type in _FIELD_CHECKS:
+            value = record.get(field)
+            if value is not None and not is_valid_type(value):
+                errors.append(f"Invalid type for '{field}': expected {expected_type}, got {type(value)}")
+
+        # Check timestamp: epoch seconds by range, strings by the strict SensorReading parser
+        timestamp = record.get("timestamp")
+        if is_number(timestamp):
+            if not 0 < timestamp < MAX_EPOCH_S:
+                errors.append(f"Epoch timestamp out of range: {timestamp}")
+        elif timestamp and parse_iso_timestamp(timestamp) is None:
+            errors.append(f"Invalid timestamp format: '{timestamp}'")
 
         # Check sensor_id not empty
-        if "sensor_id" in record and record["sensor_id"] is not None:
-            if str(record["sensor_id"]).strip() == "":
-                errors.append("sensor_id cannot be empty")
+        sensor_id = record.get("sensor_id")
+        if sensor_id is not None and str(sensor_id).strip() == "":
+            errors.append("sensor_id cannot be empty")
 
         return len(errors) == 0, errors
@@ -0,0 +1,9 @@
+"""Make the src/ packages (ingestion, anomaly, storage, ...) and main importable from tests."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# main.py attaches a FileHandler under logs/ at import time
+os.makedirs("logs", exist_ok=True)
@@ -0,0 +1,201 @@
+"""
+=============================================================
+test_pipeline.py - Realtime Pipeline Loop Helper Tests
+Author: Venkata Ganesh Kumar Nethuluri
+=============================================================
+"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+import main
+from storage.s3_uploader import Batcher
+
+
+class FatalFetchError(BaseException):
+    """Stands in for non-Exception errors such as SystemExit or KeyboardInterrupt."""
+
+
+def reading(sensor_id="sensor-001"):
+    return {"sensor_id": sensor_id, "timestamp": "2024-01-01T00:00:00Z", "temperature": 21.5}
+
+
+class PassThroughDetector:
+    def detect(self, records):
+        return records, []
+
+
+@pytest.fixture
+def run_pipeline(monkeypatch):
+    """
+    Run run_realtime_pipeline against a fake API client on a simulated clock:
+    each sleep advances the clock, and the loop is stopped with Ctrl-C after
+    `cycles` sleeps. Returns the uploader and monitor mocks plus flush times.
+    """
+    clock = [0.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: clock[0])
+
+    def run(api_client, cycles, batcher=None):
+        sleeps = []
+        flushes = []
+        batcher = batcher or Batcher()
+        flush = batcher.flush
+
+        def timed_flush():
+            flushes.append((clock[0], len(batcher)))
+            return flush()
+
+        def sleep(seconds):
+            if len(sleeps) == cycles:
+                raise KeyboardInterrupt
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        batcher.flush = timed_flush
+        uploader = mock.Mock()
+        uploader.upload.return_value = {"status": "success", "s3_keys": ["key"]}
+        monitor = mock.Mock()
+        monkeypatch.setattr(main, "IoTApiClient", lambda: api_client)
+        monkeypatch.setattr(main, "AnomalyDetector", PassThroughDetector)
+        monkeypatch.setattr(main, "AlertHandler", mock.Mock)
+        monkeypatch.setattr(main, "S3Uploader", lambda: uploader)
+        monkeypatch.setattr(main, "Batcher", lambda: batcher)
+        monkeypatch.setattr(main, "PipelineMonitor", lambda: monitor)
+        monkeypatch.setattr(main.time, "sleep", sleep)
+
+        main.run_realtime_pipeline()
+        return mock.Mock(uploader=uploader, monitor=monitor, sleeps=sleeps, flushes=flushes)
+
+    return run
+
+
+def test_prefetch_yields_pages_in_order():
+    assert list(main._prefetch(iter([[1], [2], [3]]))) == [[1], [2], [3]]
+
+
+@pytest.mark.parametrize("error", [RuntimeError("api down"), FatalFetchError("fatal")])
+def test_prefetch_reraises_producer_errors(error):
+    def pages():
+        yield [1]
+        raise error
+
+    consumed = []
+    with pytest.raises(type(error)):
+        for page in main._prefetch(pages()):
+            consumed.append(page)
+    assert consumed == [[1]]
+
+
+def test_prefetch_stops_producer_when_consumer_exits():
+    produced = []
+
+    def pages():
+        for i in range(1000):
+            produced.append(i)
+            yield [i]
+
+    before = threading.active_count()
+    pages_iter = main._prefetch(pages(), depth=1)
+    next(pages_iter)
+    pages_iter.close()
+
+    deadline = time.monotonic() + 5
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() == before
+    assert len(produced) < 10
+
+
+def test_iter_pages_single_shot_client_runs_inline():
+    class SingleShotClient:
+        def fetch_latest_readings(self):
+            return [{"sensor_id": "a"}]
+
+    before = threading.active_count()
+    assert list(main._iter_pages(SingleShotClient())) == [[{"sensor_id": "a"}]]
+    assert threading.active_count() == before
+
+
+def test_iter_pages_paginated_client_is_prefetched():
+    class PaginatedClient:
+        def iter_latest_readings(self):
+            yield [{"sensor_id": "a"}]
+            yield [{"sensor_id": "b"}]
+
+    assert list(main._iter_pages(PaginatedClient())) == [[{"sensor_id": "a"}], [{"sensor_id": "b"}]]
+
+
+@pytest.mark.parametrize("current, records_fetched, last_page_size, expected", [
+    (main.BASE_POLL_INTERVAL, 0, 0, main.BASE_POLL_INTERVAL * 1.5),
+    (main.MAX_POLL_INTERVAL, 0, 0, main.MAX_POLL_INTERVAL),
+    (main.BASE_POLL_INTERVAL, main.EXPECTED_MAX_RECORDS, main.EXPECTED_MAX_RECORDS, main.BASE_POLL_INTERVAL * 0.5),
+    (main.MIN_POLL_INTERVAL, main.EXPECTED_MAX_RECORDS, main.EXPECTED_MAX_RECORDS, main.MIN_POLL_INTERVAL),
+    (main.MAX_POLL_INTERVAL, 10, 10, main.BASE_POLL_INTERVAL),
+    # Paginated cycle that drained a large total down to a short last page: no backlog left
+    (main.BASE_POLL_INTERVAL, 5 * main.EXPECTED_MAX_RECORDS, 10, main.BASE_POLL_INTERVAL),
+    # The trailing page finished empty after data was fetched: not an empty poll
+    (main.BASE_POLL_INTERVAL, main.EXPECTED_MAX_RECORDS, 0, main.BASE_POLL_INTERVAL),
+])
+def test_next_poll_interval(current, records_fetched, last_page_size, expected):
+    assert main._next_poll_interval(current, records_fetched, last_page_size) == expected
+
+
+def test_drained_paginated_cycle_keeps_base_interval(run_pipeline):
+    class PaginatedClient:
+        def iter_latest_readings(self):
+            for page in range(3):
+                yield [reading(f"sensor-{page}-{i}") for i in range(main.EXPECTED_MAX_RECORDS)]
+            yield [reading()]
+
+    result = run_pipeline(PaginatedClient(), cycles=2)
+    assert result.sleeps == [main.BASE_POLL_INTERVAL] * 2
+
+
+def test_batch_window_enforced_while_fetch_fails(run_pipeline):
+    class FlakyClient:
+        calls = 0
+
+        def fetch_latest_readings(self):
+            self.calls += 1
+            if self.calls > 1:
+                raise RuntimeError("api down")
+            return [reading()]
+
+    result = run_pipeline(FlakyClient(), cycles=10)
+
+    # One record buffered at t=0, then every fetch fails: the window still flushes it
+    [(flushed_at, flushed_count)] = result.flushes
+    assert flushed_count == 1
+    assert 300 <= flushed_at < 300 + main.MAX_POLL_INTERVAL
+    assert flushed_at < sum(result.sleeps)
+    result.uploader.upload.assert_called_once_with([reading()])
+
+
+def run_worker(upload_result):
+    uploader = mock.Mock()
+    uploader.upload.side_effect = upload_result
+    monitor = mock.Mock()
+    upload_q = main.queue.Queue()
+    threading.Thread(target=main._uploader_worker, args=(upload_q, uploader, monitor), daemon=True).start()
+    upload_q.put([reading(), reading("sensor-002")])
+    upload_q.join()
+    return uploader, monitor
+
+
+def test_uploader_worker_retries_failed_batch(monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_RETRY_DELAY_S", 0)
+    uploader, monitor = run_worker([RuntimeError("slow down")] * (main.UPLOAD_ATTEMPTS - 1) + [{"s3_keys": ["key"]}])
+
+    assert uploader.upload.call_count == main.UPLOAD_ATTEMPTS
+    monitor.record_cycle_failure.assert_not_called()
+
+
+def test_uploader_worker_reports_dropped_batch(monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_RETRY_DELAY_S", 0)
+    uploader, monitor = run_worker(RuntimeError("access denied"))
+
+    assert uploader.upload.call_count == main.UPLOAD_ATTEMPTS
+    monitor.record_cycle_failure.assert_called_once_with("S3 upload failed, dropped 2 records: access denied")
@@ -0,0 +1,188 @@
+"""
+=============================================================
+test_s3_uploader.py - Batcher and S3 Upload Tests
+Author: Venkata Ganesh Kumar Nethuluri
+=============================================================
+"""
+
+import gzip
+from datetime import datetime
+from unittest import mock
+
+import msgspec
+import orjson
+import pytest
+import zstandard as zstd
+from botocore.exceptions import ClientError
+
+from storage import s3_uploader
+from storage.s3_uploader import Batcher, S3Uploader, partition_by_sensor
+
+
+def readings(sensor_count, per_sensor=1):
+    return [
+        {"sensor_id": f"sensor-{i:03d}", "timestamp": "2024-01-01T00:00:00Z", "temperature": 20.0 + n}
+        for i in range(sensor_count)
+        for n in range(per_sensor)
+    ]
+
+
+@pytest.fixture
+def make_uploader(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    uploaders = []
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        uploader = S3Uploader()
+        uploader.s3_client = mock.Mock()
+        uploaders.append(uploader)
+        return uploader
+
+    yield make
+    for uploader in uploaders:
+        if uploader._executor is not None:
+            uploader._executor.shutdown()
+
+
+def put_calls(uploader):
+    return {call.kwargs["Key"]: call.kwargs for call in uploader.s3_client.put_object.call_args_list}
+
+
+# ---- Batcher --------------------------------------------------------------
+
+def test_batcher_flushes_on_size():
+    batcher = Batcher(max_records=3, max_window_s=300)
+    assert not batcher.should_flush()
+    batcher.add(readings(2))
+    assert not batcher.should_flush()
+    batcher.add(readings(1))
+    assert batcher.should_flush()
+
+    assert len(batcher.flush()) == 3
+    assert len(batcher) == 0 and not batcher.should_flush()
+
+
+def test_batcher_flushes_on_window(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(s3_uploader.time, "monotonic", lambda: clock[0])
+
+    batcher = Batcher(max_records=100, max_window_s=60)
+    clock[0] += 120                     # idle time before the first record does not count
+    batcher.add(readings(1))
+    assert not batcher.should_flush()
+    clock[0] += 60
+    assert batcher.should_flush()
+
+
+# ---- partition_by_sensor --------------------------------------------------
+
+def test_partition_keeps_each_sensor_in_one_shard():
+    records = readings(20, per_sensor=3)
+    shards = partition_by_sensor(records, 4)
+
+    assert len(shards) == 4
+    assert sorted(map(id, (r for shard in shards for r in shard))) == sorted(map(id, records))
+    shard_of = {}
+    for i, shard in enumerate(shards):
+        for record in shard:
+            assert shard_of.setdefault(record["sensor_id"], i) == i
+    assert partition_by_sensor(records, 4) == shards
+
+
+# ---- S3Uploader.upload ----------------------------------------------------
+
+def test_upload_empty_is_skipped(make_uploader):
+    uploader = make_uploader()
+    assert uploader.upload([])["status"] == "skipped"
+    uploader.s3_client.put_object.assert_not_called()
+
+
+@pytest.mark.parametrize("output_format, compression, decode", [
+    ("msgpack", "zstd", lambda body: msgspec.msgpack.decode(zstd.ZstdDecompressor().decompressobj().decompress(body))),
+    ("json", "gzip", lambda body: orjson.loads(gzip.decompress(body))),
+    ("json", "none", orjson.loads),
+])
+def test_upload_single_object(make_uploader, output_format, compression, decode):
+    uploader = make_uploader(S3_OUTPUT_FORMAT=output_format, S3_COMPRESSION=compression)
+    data = readings(5)
+    result = uploader.upload(data)
+
+    assert result["status"] == "success" and result["record_count"] == 5
+    [key] = result["s3_keys"]
+    assert key.startswith("clean-data/year=") and key.endswith(f"-readings.{uploader._extension}")
+    assert result["s3_uris"] == [f"s3://{uploader.bucket_name}/{key}"]
+    assert result["s3_key"] == key and result["s3_uri"] == result["s3_uris"][0]
+
+    put = put_calls(uploader)[key]
+    assert put["Metadata"]["record-count"] == "5"
+    assert decode(put["Body"])["records"] == data
+
+
+@pytest.mark.parametrize("shards", ["1", "4"])
+def test_uploads_in_same_instant_get_distinct_keys(make_uploader, monkeypatch, shards):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return cls(2024, 1, 1, 19, 31, 0, 123456)
+
+    monkeypatch.setattr(s3_uploader, "datetime", FrozenDatetime)
+    uploader = make_uploader(S3_UPLOAD_SHARDS=shards)
+    first = uploader.upload(readings(8))["s3_keys"]
+    second = uploader.upload(readings(8))["s3_keys"]
+
+    assert not set(first) & set(second)
+    assert len(put_calls(uploader)) == len(first) + len(second)
+
+
+def test_upload_sharded(make_uploader):
+    uploader = make_uploader(S3_UPLOAD_SHARDS="4", S3_OUTPUT_FORMAT="json", S3_COMPRESSION="none")
+    data = readings(20, per_sensor=2)
+    result = uploader.upload(data)
+
+    assert result["status"] == "success" and result["record_count"] == 40
+    puts = put_calls(uploader)
+    assert sorted(result["s3_keys"]) == sorted(puts)
+    assert all("-readings-part" in key for key in puts)
+    uploaded = [r for put in puts.values() for r in orjson.loads(put["Body"])["records"]]
+    assert sorted(uploaded, key=lambda r: (r["sensor_id"], r["temperature"])) == data
+
+
+def test_upload_sharded_failure_logs_written_shards(make_uploader, caplog):
+    uploader = make_uploader(S3_UPLOAD_SHARDS="4", S3_OUTPUT_FORMAT="json", S3_COMPRESSION="none")
+    error = ClientError({"Error": {"Code": "SlowDown", "Message": "slow down"}}, "PutObject")
+
+    def put_object(**kwargs):
+        if kwargs["Key"].endswith("part00.json"):
+            raise error
+
+    uploader.s3_client.put_object.side_effect = put_object
+    with pytest.raises(ClientError):
+        uploader.upload(readings(20))
+
+    written = [key for key in put_calls(uploader) if not key.endswith("part00.json")]
+    assert written
+    assert any("Sharded upload incomplete" in r.getMessage() and all(k in r.getMessage() for k in written)
+               for r in caplog.records)
+
+
+def test_large_body_uses_multipart_upload(make_uploader, monkeypatch):
+    monkeypatch.setattr(s3_uploader, "MULTIPART_THRESHOLD", 0)
+    uploader = make_uploader(S3_OUTPUT_FORMAT="json", S3_COMPRESSION="gzip")
+    uploaded = {}
+
+    def upload_fileobj(fileobj, bucket, key, Config, ExtraArgs):
+        uploaded.update(body=fileobj.read(), bucket=bucket, key=key, config=Config, extra_args=ExtraArgs)
+
+    uploader.s3_client.upload_fileobj.side_effect = upload_fileobj
+    data = readings(5)
+    result = uploader.upload(data)
+
+    uploader.s3_client.put_object.assert_not_called()
+    assert uploaded["bucket"] == uploader.bucket_name and uploaded["key"] == result["s3_key"]
+    assert uploaded["config"] is s3_uploader.TRANSFER_CONFIG
+    assert uploaded["extra_args"]["ContentType"] == "application/json"
+    assert uploaded["extra_args"]["ContentEncoding"] == "gzip"
+    assert uploaded["extra_args"]["Metadata"]["record-count"] == "5"
+    assert orjson.loads(gzip.decompress(uploaded["body"]))["records"] == data
@@ -0,0 +1,120 @@
+"""
+=============================================================
+test_validator.py - Data Validator Tests
+Author: Venkata Ganesh Kumar Nethuluri
+=============================================================
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from ingestion.data_validator import DataValidator
+
+
+def reading(**overrides):
+    record = {"sensor_id": "sensor-001", "timestamp": "2024-01-01T00:00:00Z", "temperature": 21.5}
+    record.update(overrides)
+    return record
+
+
+@pytest.fixture
+def validator():
+    return DataValidator()
+
+
+@pytest.mark.parametrize("timestamp", [
+    "2024-01-01T00:00:00",
+    "2024-01-01T00:00:00Z",
+    "2024-01-01 00:00:00",
+    "2024-01-01T00:00:00.123456+05:30",
+    datetime(2024, 1, 1, tzinfo=timezone.utc),
+    1700000000,
+    1700000000.5,
+])
+def test_valid_timestamps_pass(validator, timestamp):
+    valid, invalid = validator.validate([reading(timestamp=timestamp)])
+    assert len(valid) == 1 and invalid == []
+
+
+@pytest.mark.parametrize("timestamp", [
+    "2024-02-30T00:00:00",          # no such calendar date
+    "2024-13-01T00:00:00",
+    "2024-01-01T24:00:00",
+    "2024-01-01T00:00:00+99:99",    # invalid UTC offset
+    "2024-01-01T00:00:00\n",        # trailing newline
+    "not-a-timestamp",
+    0,
+    4102444800,                     # 2100-01-01, exclusive bound
+    1.7e12,                         # epoch milliseconds, not seconds
+    True,
+])
+def test_invalid_timestamps_rejected(validator, timestamp):
+    valid, invalid = validator.validate([reading(timestamp=timestamp)])
+    assert valid == []
+    assert len(invalid) == 1 and invalid[0]["errors"]
+
+
+@pytest.mark.parametrize("timestamp", ["2024-02-30T00:00:00", "2024-01-01T00:00:00\n"])
+def test_invalid_timestamp_rejected_in_mixed_batch(validator, timestamp):
+    good = reading()
+    bad = reading(sensor_id="sensor-002", timestamp=timestamp)
+    valid, invalid = validator.validate([good, bad])
+    assert valid == [good]
+    assert [entry["record"] for entry in invalid] == [bad]
+    assert invalid[0]["errors"] == [f"Invalid timestamp format: '{timestamp}'"]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"temperature": np.float64(21.5)},
+    {"temperature": np.float32(21.5), "humidity": np.int64(40)},
+    {"timestamp": np.int64(1700000000)},
+    {"timestamp": np.float64(1700000000.5)},
+])
+def test_numpy_scalars_accepted(validator, overrides):
+    record = reading(**overrides)
+    valid, invalid = validator.validate([reading(sensor_id="sensor-002"), record])
+    assert invalid == []
+    assert valid[1] is record
+
+
+@pytest.mark.parametrize("overrides", [
+    {"temperature": np.bool_(True)},
+    {"temperature": True},
+    {"timestamp": np.int64(0)},
+])
+def test_numpy_and_bool_non_numbers_rejected(validator, overrides):
+    valid, invalid = validator.validate([reading(**overrides)])
+    assert valid == []
+    assert invalid[0]["errors"]
+
+
+def test_steady_sensor_still_fully_validated(validator):
+    history = [reading() for _ in range(500)]
+    validator.validate(history)
+
+    bad = reading(temperature="21.5")
+    valid, invalid = validator.validate([reading(), bad])
+    assert [entry["record"] for entry in invalid] == [bad]
+    assert invalid[0]["errors"] == [
+        "Invalid type for 'temperature': expected (<class 'int'>, <class 'float'>), got <class 'str'>"
+    ]
+
+
+def test_clean_batch_returned_whole(validator):
+    records = [reading(sensor_id=f"sensor-{i:03d}", humidity=40.0, pressure=None) for i in range(50)]
+    valid, invalid = validator.validate(records)
+    assert invalid == []
+    assert valid == records and all(v is r for v, r in zip(valid, records))
+
+
+@pytest.mark.parametrize("record, errors", [
+    ({"sensor_id": "sensor-001", "temperature": 21.5}, ["Missing required field: 'timestamp'"]),
+    (reading(sensor_id="   "), ["sensor_id cannot be empty"]),
+    (reading(temperature=None), ["Missing required field: 'temperature'"]),
+])
+def test_rejected_records_explained(validator, record, errors):
+    valid, invalid = validator.validate([reading(), record])
+    assert valid == [reading()]
+    assert invalid == [{"record": record, "errors": errors}]